@@ -2,43 +2,62 @@
 
 import os
 import uuid
+import asyncio
+import secrets
 from datetime import date
 from typing import Dict, Any, Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Form, HTTPException, Query, UploadFile, File
+from fastapi import FastAPI, Form, Header, HTTPException, Query, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from pydantic import BaseModel, ValidationError
 from dotenv import load_dotenv
 
+# Load environment variables before importing modules that read them at import time
+load_dotenv()
+
 from llm import init_gemini, analyze_transcript
-from notion_sync import sync_to_notion
+from notion_sync import sync_to_notion, close_notion
 from transcription import (
     transcribe_audio_video, 
-    save_upload_file, 
     validate_file_format, 
     validate_file_size,
-    get_supported_formats
+    get_supported_formats,
+    MAX_FILE_SIZE_BYTES
 )
 from database import (
     init_database, 
+    compute_transcript_id,
     TranscriptStorage, 
     AnalysisStorage, 
     SyncStorage,
-    cleanup_old_data
+    cleanup_old_data,
+    incremental_vacuum,
+    vacuum_database
 )
 
 
-# Load environment variables
-load_dotenv()
+VACUUM_INTERVAL_SECONDS = 3600
+# Allowance for multipart framing and form fields around an uploaded file
+UPLOAD_OVERHEAD_BYTES = 1024 * 1024
 
 
 class NotionSyncRequest(BaseModel):
     """Request model for Notion sync endpoint."""
     analysis: Dict[str, Any]
-    analysis_id: Optional[str] = None
+    analysis_id: Optional[uuid.UUID] = None
     meeting_url: Optional[str] = None
+    meeting_page_id: Optional[str] = None
+    known_empty: bool = False
+
+
+async def periodic_incremental_vacuum():
+    """Reclaim free database pages in small steps on a timer."""
+    while True:
+        await asyncio.sleep(VACUUM_INTERVAL_SECONDS)
+        await run_in_threadpool(incremental_vacuum)
 
 
 @asynccontextmanager
@@ -46,13 +65,16 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     # Initialize database and Gemini on startup
     try:
-        init_database()
+        await run_in_threadpool(init_database)
         init_gemini()  # This initializes Gemini for analysis
         # Clean up old data on startup (older than 30 days)
-        cleanup_old_data(30)
+        await run_in_threadpool(cleanup_old_data, 30)
     except Exception as e:
         print(f"Warning: Failed to initialize services: {e}")
+    vacuum_task = asyncio.create_task(periodic_incremental_vacuum())
     yield
+    vacuum_task.cancel()
+    await close_notion()
 
 
 # Create FastAPI app
@@ -60,13 +82,31 @@ app = FastAPI(
     title="Meeting Actions",
     description="Extract decisions and action items from meeting transcripts",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized uploads before Starlette spools the body to disk."""
+    if request.method == "POST" and request.url.path == "/upload":
+        try:
+            content_length = int(request.headers["content-length"])
+        except (KeyError, ValueError):
+            return ORJSONResponse(status_code=411, content={"detail": "Content-Length required"})
+        if content_length > MAX_FILE_SIZE_BYTES + UPLOAD_OVERHEAD_BYTES:
+            max_size = get_supported_formats()["max_size_mb"]
+            return ORJSONResponse(
+                status_code=413,
+                content={"detail": f"File too large. Maximum size: {max_size}MB"}
+            )
+    return await call_next(request)
+
+
 @app.get("/")
 async def root():
     """Serve the main HTML page."""
@@ -93,10 +133,10 @@ async def ingest_transcript(transcript: str = Form(...)):
     if not transcript.strip():
         raise HTTPException(status_code=400, detail="Transcript cannot be empty")
     
-    transcript_id = str(uuid.uuid4())
+    transcript_id = compute_transcript_id(transcript)
     
     # Save transcript to database
-    if not TranscriptStorage.save_transcript(transcript_id, transcript.strip()):
+    if not await run_in_threadpool(TranscriptStorage.save_transcript, transcript_id, transcript.strip()):
         raise HTTPException(status_code=500, detail="Failed to save transcript")
     
     return {"transcript_id": transcript_id}
@@ -134,18 +174,16 @@ async def upload_audio_video(
         )
     
     try:
-        # Save uploaded file
-        file_path = await save_upload_file(file)
-        
-        # Transcribe audio/video
-        transcript_text = await transcribe_audio_video(file_path, language)
+        # Decode the already-received upload directly; no temp file copy
+        await file.seek(0)
+        transcript_text = await transcribe_audio_video(file.file, language)
         
         if not transcript_text.strip():
             raise HTTPException(status_code=400, detail="No speech detected in the file")
         
         # Generate transcript ID and save to database
-        transcript_id = str(uuid.uuid4())
-        if not TranscriptStorage.save_transcript(transcript_id, transcript_text.strip()):
+        transcript_id = compute_transcript_id(transcript_text)
+        if not await run_in_threadpool(TranscriptStorage.save_transcript, transcript_id, transcript_text.strip()):
             raise HTTPException(status_code=500, detail="Failed to save transcript")
         
         return {
@@ -172,12 +210,44 @@ async def get_supported_file_formats():
     return get_supported_formats()
 
 
+async def sync_with_error_result(
+    analysis: Dict[str, Any],
+    meeting_url: Optional[str]
+) -> Dict[str, Any]:
+    """Sync to Notion, reporting a failure in the result instead of raising."""
+    try:
+        return await sync_to_notion(analysis, meeting_url)
+    except Exception as e:
+        return {
+            "created": {"actions": 0, "decisions": 0},
+            "updated": {"actions": 0, "decisions": 0},
+            "errors": [f"Notion sync failed: {str(e)}"]
+        }
+
+
+async def sync_existing_analysis(
+    analysis: Dict[str, Any],
+    analysis_id: str,
+    meeting_url: Optional[str]
+) -> Dict[str, Any]:
+    """Sync an already stored analysis, reusing a previous successful sync."""
+    existing_sync = await run_in_threadpool(SyncStorage.get_sync_status, analysis_id)
+    if existing_sync and not existing_sync["sync_result"].get("errors"):
+        return existing_sync["sync_result"]
+    
+    results = await sync_with_error_result(analysis, meeting_url)
+    await run_in_threadpool(SyncStorage.save_sync_result, analysis_id, meeting_url, results)
+    return results
+
+
 @app.post("/analyze")
 async def analyze_meeting(
-    transcript_id: str = Query(...),
+    transcript_id: uuid.UUID = Query(...),
     team: str = Query(...),
     product: str = Query(...),
-    date: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    meeting_date: date = Query(..., alias="date"),
+    sync: bool = Query(False),
+    meeting_url: Optional[str] = Query(None)
 ):
     """
     Analyze a meeting transcript to extract decisions and action items.
@@ -186,48 +256,60 @@ async def analyze_meeting(
         transcript_id: ID of the ingested transcript
         team: Team name for context
         product: Product name for context
-        date: Meeting date in YYYY-MM-DD format
+        meeting_date: Meeting date in YYYY-MM-DD format (query param "date")
+        sync: Also sync the results to Notion
+        meeting_url: Optional meeting URL for the Notion sync
         
     Returns:
         Analysis results with decisions and actions, plus analysis_id
+        (and the Notion sync results under "sync" when requested)
     """
-    # Check if transcript exists in database
-    transcript = TranscriptStorage.get_transcript(transcript_id)
-    if not transcript:
-        raise HTTPException(status_code=404, detail="Transcript not found")
+    transcript_id = str(transcript_id)
+    meeting_date_str = meeting_date.isoformat()
     
-    # Check if analysis already exists for this transcript
-    existing_analysis = AnalysisStorage.get_analysis_by_transcript(transcript_id)
-    if existing_analysis and (
-        existing_analysis["team"] == team and 
-        existing_analysis["product"] == product and 
-        existing_analysis["meeting_date"] == date
-    ):
+    # Check if this transcript was already analyzed for the same meeting
+    existing_analysis = await run_in_threadpool(
+        AnalysisStorage.get_analysis_by_hash_and_meta, transcript_id, team, product, meeting_date_str
+    )
+    if existing_analysis:
         # Return existing analysis with its ID
         result = existing_analysis["analysis_data"].copy()
         result["analysis_id"] = existing_analysis["id"]
+        if sync:
+            result["sync"] = await sync_existing_analysis(
+                existing_analysis["analysis_data"], existing_analysis["id"], meeting_url
+            )
         return result
     
+    # Check if transcript exists in database
+    transcript = await run_in_threadpool(TranscriptStorage.get_transcript, transcript_id)
+    if not transcript:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    
     try:
-        # Validate date format  
-        from datetime import date as date_cls
-        date_obj = date_cls.fromisoformat(date)
-        
         # Analyze transcript using Gemini
-        analysis = analyze_transcript(transcript, team, product, date)
+        analysis = await analyze_transcript(transcript, team, product, meeting_date_str)
         
-        # Save analysis to database
-        analysis_id = str(uuid.uuid4())
-        if not AnalysisStorage.save_analysis(
-            analysis_id, transcript_id, team, product, date, analysis
-        ):
-            print("Warning: Failed to save analysis to database")
+        # Save before syncing; a concurrent request for the same meeting may
+        # have stored one first, in which case that one is returned and synced
+        stored = await run_in_threadpool(
+            AnalysisStorage.save_analysis,
+            str(uuid.uuid4()), transcript_id, team, product, meeting_date_str, analysis
+        )
+        if not stored:
+            raise HTTPException(status_code=500, detail="Failed to save analysis")
         
-        # Add analysis_id to response
-        result = analysis.copy()
-        result["analysis_id"] = analysis_id
+        # Return the stored analysis with its ID
+        result = stored["analysis_data"].copy()
+        result["analysis_id"] = stored["id"]
+        if sync:
+            result["sync"] = await sync_existing_analysis(
+                stored["analysis_data"], stored["id"], meeting_url
+            )
         return result
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -245,21 +327,25 @@ async def sync_notion(request: NotionSyncRequest):
     Returns:
         Sync results with created and updated counts
     """
+    analysis_id = str(request.analysis_id) if request.analysis_id else None
     try:
         # Check if already synced
-        if request.analysis_id:
-            existing_sync = SyncStorage.get_sync_status(request.analysis_id)
+        if analysis_id:
+            existing_sync = await run_in_threadpool(SyncStorage.get_sync_status, analysis_id)
             if existing_sync and not existing_sync["sync_result"].get("errors"):
                 # Return previous successful sync result
                 return existing_sync["sync_result"]
         
         # Perform sync
-        results = sync_to_notion(request.analysis, request.meeting_url)
+        results = await sync_to_notion(
+            request.analysis, request.meeting_url, request.meeting_page_id, request.known_empty
+        )
         
         # Save sync result to database
-        if request.analysis_id:
-            SyncStorage.save_sync_result(
-                request.analysis_id,
+        if analysis_id:
+            await run_in_threadpool(
+                SyncStorage.save_sync_result,
+                analysis_id,
                 request.meeting_url,
                 results
             )
@@ -273,49 +359,81 @@ async def sync_notion(request: NotionSyncRequest):
 
 
 @app.get("/history/transcripts")
-async def get_transcript_history(limit: int = Query(10, ge=1, le=50)):
+async def get_transcript_history(
+    limit: int = Query(10, ge=1, le=50),
+    before_id: Optional[uuid.UUID] = Query(None)
+):
     """
     Get recent transcript history.
     
     Args:
         limit: Number of recent transcripts to return (1-50)
+        before_id: Return transcripts older than this ID (for paging)
         
     Returns:
-        List of recent transcripts with metadata
+        List of recent transcripts with a content preview
     """
     try:
-        transcripts = TranscriptStorage.get_recent_transcripts(limit)
-        # Truncate content for preview
-        for transcript in transcripts:
-            if len(transcript["content"]) > 200:
-                transcript["content_preview"] = transcript["content"][:200] + "..."
-            else:
-                transcript["content_preview"] = transcript["content"]
+        transcripts = await run_in_threadpool(
+            TranscriptStorage.get_recent_transcripts, limit, str(before_id) if before_id else None
+        )
         return {"transcripts": transcripts}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve history: {str(e)}")
 
 
 @app.get("/history/analyses")
-async def get_analysis_history(limit: int = Query(10, ge=1, le=50)):
+async def get_analysis_history(
+    limit: int = Query(10, ge=1, le=50),
+    before_id: Optional[uuid.UUID] = Query(None)
+):
     """
     Get recent analysis history.
     
     Args:
         limit: Number of recent analyses to return (1-50)
+        before_id: Return analyses older than this ID (for paging)
         
     Returns:
-        List of recent analyses with metadata
+        List of recent analyses with metadata and item counts
     """
     try:
-        analyses = AnalysisStorage.get_recent_analyses(limit)
+        analyses = await run_in_threadpool(
+            AnalysisStorage.get_recent_analyses, limit, str(before_id) if before_id else None
+        )
         return {"analyses": analyses}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve analysis history: {str(e)}")
 
 
+@app.get("/history/analyses/{analysis_id}")
+async def get_analysis_detail(analysis_id: uuid.UUID):
+    """
+    Get a single analysis with its full results and transcript.
+    
+    Args:
+        analysis_id: The analysis ID to load
+        
+    Returns:
+        Analysis row with analysis_data and transcript_content
+    """
+    try:
+        analysis = await run_in_threadpool(AnalysisStorage.get_analysis, str(analysis_id))
+        if not analysis:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        
+        analysis["transcript_content"] = await run_in_threadpool(
+            TranscriptStorage.get_transcript, analysis["transcript_id"]
+        )
+        return analysis
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve analysis: {str(e)}")
+
+
 @app.get("/recovery/transcript/{transcript_id}")
-async def recover_transcript(transcript_id: str):
+async def recover_transcript(transcript_id: uuid.UUID):
     """
     Recover a transcript by ID for data recovery.
     
@@ -325,13 +443,14 @@ async def recover_transcript(transcript_id: str):
     Returns:
         Transcript content and any associated analysis
     """
+    transcript_id = str(transcript_id)
     try:
-        transcript = TranscriptStorage.get_transcript(transcript_id)
+        transcript = await run_in_threadpool(TranscriptStorage.get_transcript, transcript_id)
         if not transcript:
             raise HTTPException(status_code=404, detail="Transcript not found")
         
         # Also get any existing analysis
-        analysis = AnalysisStorage.get_analysis_by_transcript(transcript_id)
+        analysis = await run_in_threadpool(AnalysisStorage.get_analysis_by_transcript, transcript_id)
         
         return {
             "transcript_id": transcript_id,
@@ -345,6 +464,25 @@ async def recover_transcript(transcript_id: str):
         raise HTTPException(status_code=500, detail=f"Recovery failed: {str(e)}")
 
 
+@app.post("/admin/vacuum")
+async def admin_vacuum(x_admin_token: Optional[str] = Header(None)):
+    """
+    Run a full VACUUM of the database. Requires the X-Admin-Token header.
+    
+    Returns:
+        Dictionary confirming the vacuum completed
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or not x_admin_token or not secrets.compare_digest(x_admin_token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    
+    try:
+        await run_in_threadpool(vacuum_database)
+        return {"ok": True}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Vacuum failed: {str(e)}")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,119 @@
+"""Two-level cache (in-process L1, Redis L2) for transcripts and analyses."""
+
+import os
+import threading
+from typing import Callable, Dict, Any, Optional, Union
+
+import orjson
+import redis
+from cachetools import TTLCache
+
+KEY_PREFIX = "meeting:"
+TRANSCRIPT_TTL = 3600  # 1 hour
+ANALYSIS_TTL = 86400  # 24 hours
+L1_MAXSIZE = 512
+L1_TTL = 300  # Bounds staleness of per-worker entries
+
+_l1: TTLCache = TTLCache(maxsize=L1_MAXSIZE, ttl=L1_TTL)
+_l1_lock = threading.Lock()
+
+_redis_pool: Optional[redis.ConnectionPool] = None
+_redis_lock = threading.Lock()
+
+
+def _get_redis() -> Optional[redis.Redis]:
+    """Return a Redis client backed by a shared pool, or None if not configured."""
+    global _redis_pool
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        return None
+    if _redis_pool is None:
+        with _redis_lock:
+            if _redis_pool is None:
+                _redis_pool = redis.ConnectionPool.from_url(redis_url)
+    return redis.Redis(connection_pool=_redis_pool)
+
+
+def _transcript_key(transcript_id: str) -> str:
+    return f"{KEY_PREFIX}t:{transcript_id}"
+
+
+def _analysis_key(transcript_id: str) -> str:
+    return f"{KEY_PREFIX}a:bytid:{transcript_id}"
+
+
+def _l1_get(key: str) -> Any:
+    with _l1_lock:
+        return _l1.get(key)
+
+
+def _l1_set(key: str, value: Any) -> None:
+    with _l1_lock:
+        _l1[key] = value
+
+
+def _get(key: str, loads: Callable[[str], Any] = str) -> Any:
+    """Look up a key in L1, then Redis (promoting decoded hits into L1)."""
+    value = _l1_get(key)
+    if value is not None:
+        return value
+    r = _get_redis()
+    if r is None:
+        return None
+    try:
+        raw = r.get(key)
+    except redis.RedisError as e:
+        print(f"Error reading cache: {e}")
+        return None
+    if raw is None:
+        return None
+    value = loads(raw.decode())
+    _l1_set(key, value)
+    return value
+
+
+def _set(key: str, value: Any, serialized: Union[str, bytes], ttl: int) -> None:
+    """Write a key through to L1 and Redis."""
+    _l1_set(key, value)
+    r = _get_redis()
+    if r is None:
+        return
+    try:
+        r.set(key, serialized, ex=ttl)
+    except redis.RedisError as e:
+        print(f"Error writing cache: {e}")
+
+
+def get_transcript_cached(transcript_id: str) -> Optional[str]:
+    """Get cached transcript content."""
+    return _get(_transcript_key(transcript_id))
+
+
+def set_transcript_cached(transcript_id: str, content: str) -> None:
+    """Cache transcript content."""
+    _set(_transcript_key(transcript_id), content, content, TRANSCRIPT_TTL)
+
+
+def get_analysis_cached(transcript_id: str) -> Optional[Dict[str, Any]]:
+    """Get the cached latest analysis row for a transcript (treat as read-only)."""
+    return _get(_analysis_key(transcript_id), orjson.loads)
+
+
+def set_analysis_cached(transcript_id: str, analysis: Dict[str, Any]) -> None:
+    """Cache the latest analysis row for a transcript."""
+    _set(_analysis_key(transcript_id), analysis, orjson.dumps(analysis), ANALYSIS_TTL)
+
+
+def invalidate(transcript_id: str) -> None:
+    """Drop all cached entries for a transcript."""
+    keys = [_transcript_key(transcript_id), _analysis_key(transcript_id)]
+    with _l1_lock:
+        for key in keys:
+            _l1.pop(key, None)
+    r = _get_redis()
+    if r is None:
+        return
+    try:
+        r.delete(*keys)
+    except redis.RedisError as e:
+        print(f"Error invalidating cache: {e}")
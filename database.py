@@ -1,67 +1,276 @@
 """Database layer for persistent storage of transcripts and analysis results."""
 
 import sqlite3
-import json
 import os
+import hashlib
+import queue
+import threading
+import uuid
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 from contextlib import contextmanager
 
+import orjson
+import cache
+
 DATABASE_PATH = "meeting_actions.db"
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+INCREMENTAL_VACUUM_PAGES = 1000
+PREVIEW_LENGTH = 200
 
+# Long-lived connections handed out by get_db_connection()
+_POOL: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=POOL_SIZE)
+_pool_lock = threading.Lock()
+_pool_ready = False
 
-def init_database():
-    """Initialize the database with required tables."""
-    with sqlite3.connect(DATABASE_PATH) as conn:
-        cursor = conn.cursor()
-        
-        # Transcripts table
+
+def _open_connection() -> sqlite3.Connection:
+    """Open a pooled connection tuned for concurrent access."""
+    conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row  # Enable dict-like access
+    # Must precede the WAL switch to take effect on a fresh database
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+
+def _init_pool() -> None:
+    """Fill the connection pool once per process."""
+    global _pool_ready
+    with _pool_lock:
+        if _pool_ready:
+            return
+        for _ in range(POOL_SIZE):
+            _POOL.put(_open_connection())
+        _pool_ready = True
+
+
+# Keys are 16-byte UUID BLOBs; {name} lets the ID migration build copies
+TABLE_SCHEMAS = {
+    "transcripts": """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id BLOB PRIMARY KEY NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    "analysis_results": """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id BLOB PRIMARY KEY NOT NULL,
+            transcript_id BLOB NOT NULL,
+            team TEXT NOT NULL,
+            product TEXT NOT NULL,
+            meeting_date TEXT NOT NULL,
+            analysis_data TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (transcript_id) REFERENCES transcripts (id)
+        )
+    """,
+    "sync_status": """
+        CREATE TABLE IF NOT EXISTS {name} (
+            analysis_id BLOB PRIMARY KEY NOT NULL,
+            meeting_url TEXT,
+            sync_result TEXT,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (analysis_id) REFERENCES analysis_results (id)
+        )
+    """,
+}
+
+# Columns holding IDs, per table, in the order they are copied by the migration
+ID_COLUMNS = {
+    "transcripts": ("id",),
+    "analysis_results": ("id", "transcript_id"),
+    "sync_status": ("analysis_id",),
+}
+
+
+def _id_to_blob(value: Optional[str]) -> Optional[bytes]:
+    """Convert a UUID string to its 16-byte form (None if it is not a UUID)."""
+    try:
+        return uuid.UUID(value).bytes
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _blob_to_id(value: bytes) -> str:
+    """Convert a 16-byte UUID back to its canonical string form."""
+    return str(uuid.UUID(bytes=value))
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    """Convert a row to a dict with BLOB keys rendered as UUID strings."""
+    result = dict(row)
+    for key in ("id", "transcript_id", "analysis_id"):
+        if isinstance(result.get(key), bytes):
+            result[key] = _blob_to_id(result[key])
+    return result
+
+
+def _has_text_ids(cursor: sqlite3.Cursor) -> bool:
+    """Whether the tables predate BLOB keys and still store IDs as TEXT."""
+    columns = cursor.execute("PRAGMA table_info(transcripts)").fetchall()
+    return any(col["name"] == "id" and col["type"].upper() == "TEXT" for col in columns)
+
+
+def migrate_ids_to_blob(conn: sqlite3.Connection) -> None:
+    """One-off migration of TEXT UUID keys to 16-byte BLOBs.
+    
+    Rows are copied into new tables with converted keys, then the new tables
+    replace the old ones. Run inside the caller's transaction so the swap is
+    atomic; indexes are recreated afterwards by the schema migration.
+    """
+    conn.create_function("uuid_blob", 1, _id_to_blob, deterministic=True)
+    cursor = conn.cursor()
+    for table, ddl in TABLE_SCHEMAS.items():
+        cursor.execute(ddl.format(name=f"{table}_new"))
+        columns = [col["name"] for col in cursor.execute(f"PRAGMA table_info({table})")]
+        select = ", ".join(
+            f"uuid_blob({col})" if col in ID_COLUMNS[table] else col for col in columns
+        )
+        # Rows whose key is not a UUID convert to NULL and are skipped
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO {table}_new ({", ".join(columns)})
+            SELECT {select} FROM {table}
+        """)
+    # Drop dependants first, then move the copies into place
+    for table in reversed(list(TABLE_SCHEMAS)):
+        cursor.execute(f"DROP TABLE {table}")
+    for table in TABLE_SCHEMAS:
+        cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    print("Database IDs migrated to BLOB keys")
+
+
+def _migrate_to_v1(conn: sqlite3.Connection) -> None:
+    """Create the tables and indexes (BLOB keys, deduplicated analyses)."""
+    cursor = conn.cursor()
+    if _has_text_ids(cursor):
+        migrate_ids_to_blob(conn)
+    
+    for table, ddl in TABLE_SCHEMAS.items():
+        cursor.execute(ddl.format(name=table))
+    
+    # Indexes matching the lookup, history and cleanup predicates
+    cursor.execute("DROP INDEX IF EXISTS idx_ar_created_at")
+    cursor.execute("DROP INDEX IF EXISTS idx_ar_tid")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ar_tid_created
+        ON analysis_results (transcript_id, created_at DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ar_created
+        ON analysis_results (created_at DESC, id DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_t_updated
+        ON transcripts (updated_at DESC, id DESC)
+    """)
+    
+    # One analysis per transcript and meeting metadata
+    has_meta_index = cursor.execute("""
+        SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_ar_tid_meta'
+    """).fetchone()
+    if not has_meta_index:
+        # Keep only the newest analysis of any existing duplicates
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS transcripts (
-                id TEXT PRIMARY KEY,
-                content TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            DELETE FROM analysis_results
+            WHERE rowid NOT IN (
+                SELECT max(rowid) FROM analysis_results
+                GROUP BY transcript_id, team, product, meeting_date
             )
         """)
-        
-        # Analysis results table
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS analysis_results (
-                id TEXT PRIMARY KEY,
-                transcript_id TEXT NOT NULL,
-                team TEXT NOT NULL,
-                product TEXT NOT NULL,
-                meeting_date TEXT NOT NULL,
-                analysis_data TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (transcript_id) REFERENCES transcripts (id)
-            )
+            DELETE FROM sync_status
+            WHERE analysis_id NOT IN (SELECT id FROM analysis_results)
         """)
-        
-        # Sync status table
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sync_status (
-                analysis_id TEXT PRIMARY KEY,
-                meeting_url TEXT,
-                sync_result TEXT,
-                synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (analysis_id) REFERENCES analysis_results (id)
-            )
+            CREATE UNIQUE INDEX idx_ar_tid_meta
+            ON analysis_results (transcript_id, team, product, meeting_date)
         """)
+
+
+# MIGRATIONS[n] upgrades a database from user_version n to n + 1
+MIGRATIONS = [_migrate_to_v1]
+CURRENT_SCHEMA_VERSION = len(MIGRATIONS)
+
+_schema_ready = False
+
+
+def init_database():
+    """Bring the database schema up to CURRENT_SCHEMA_VERSION."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    _init_pool()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Existing databases created without auto_vacuum need one full VACUUM
+        # to switch modes; only do it when explicitly requested.
+        auto_vacuum = cursor.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if auto_vacuum != 2 and os.getenv("DB_MIGRATE_AUTO_VACUUM") == "1":
+            cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            cursor.execute("VACUUM")
+            print("Database migrated to incremental auto_vacuum")
         
-        conn.commit()
+        if cursor.execute("PRAGMA user_version").fetchone()[0] < CURRENT_SCHEMA_VERSION:
+            # Re-check under the write lock; another worker may have migrated
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                version = cursor.execute("PRAGMA user_version").fetchone()[0]
+                for migrate in MIGRATIONS[version:]:
+                    migrate(conn)
+                cursor.execute(f"PRAGMA user_version = {CURRENT_SCHEMA_VERSION}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            if version < CURRENT_SCHEMA_VERSION:
+                print(f"Database migrated to schema version {CURRENT_SCHEMA_VERSION}")
+    _schema_ready = True
 
 
 @contextmanager
 def get_db_connection():
-    """Context manager for database connections."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row  # Enable dict-like access
+    """Context manager that checks a connection out of the pool."""
+    if not _pool_ready:
+        _init_pool()
+    conn = _POOL.get()
     try:
         yield conn
     finally:
-        conn.close()
+        _POOL.put(conn)
+
+
+def compute_transcript_id(content: str) -> str:
+    """Compute a content-addressed transcript ID so re-ingests are idempotent."""
+    digest = hashlib.blake2b(content.strip().encode(), digest_size=16).digest()
+    return str(uuid.UUID(bytes=digest))
+
+
+# IDs are always fresh; the analysis that already exists for the same
+# transcript and meeting metadata wins
+INSERT_ANALYSIS_SQL = """
+    INSERT INTO analysis_results 
+    (id, transcript_id, team, product, meeting_date, analysis_data)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(transcript_id, team, product, meeting_date) DO NOTHING
+"""
+
+SELECT_ANALYSIS_BY_META_SQL = """
+    SELECT * FROM analysis_results
+    WHERE transcript_id = ? AND team = ? AND product = ? AND meeting_date = ?
+"""
+
+INSERT_SYNC_SQL = """
+    INSERT OR REPLACE INTO sync_status 
+    (analysis_id, meeting_url, sync_result, synced_at)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+"""
 
 
 class TranscriptStorage:
@@ -69,16 +278,25 @@ class TranscriptStorage:
     
     @staticmethod
     def save_transcript(transcript_id: str, content: str) -> bool:
-        """Save a transcript to the database."""
+        """Save a transcript to the database.
+        
+        IDs are content-addressed, so re-ingesting the same text only bumps
+        updated_at; this keeps it off the cleanup list and at the top of
+        the history.
+        """
+        # Store exactly the text the ID was computed from
+        content = content.strip()
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    INSERT OR REPLACE INTO transcripts (id, content, updated_at)
-                    VALUES (?, ?, CURRENT_TIMESTAMP)
-                """, (transcript_id, content))
+                    INSERT INTO transcripts (id, content)
+                    VALUES (?, ?)
+                    ON CONFLICT(id) DO UPDATE SET updated_at = CURRENT_TIMESTAMP
+                """, (_id_to_blob(transcript_id), content))
                 conn.commit()
-                return True
+            cache.set_transcript_cached(transcript_id, content)
+            return True
         except Exception as e:
             print(f"Error saving transcript: {e}")
             return False
@@ -86,29 +304,47 @@ class TranscriptStorage:
     @staticmethod
     def get_transcript(transcript_id: str) -> Optional[str]:
         """Retrieve a transcript by ID."""
+        cached = cache.get_transcript_cached(transcript_id)
+        if cached is not None:
+            return cached
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT content FROM transcripts WHERE id = ?", (transcript_id,))
+                cursor.execute("SELECT content FROM transcripts WHERE id = ?", (_id_to_blob(transcript_id),))
                 row = cursor.fetchone()
-                return row["content"] if row else None
+            if not row:
+                return None
+            cache.set_transcript_cached(transcript_id, row["content"])
+            return row["content"]
         except Exception as e:
             print(f"Error retrieving transcript: {e}")
             return None
     
     @staticmethod
-    def get_recent_transcripts(limit: int = 10) -> List[Dict[str, Any]]:
-        """Get recent transcripts with metadata."""
+    def get_recent_transcripts(limit: int = 10, before_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get recent transcripts with a content preview, newest first.
+        
+        Pass the last returned ID as `before_id` to fetch the next page.
+        """
+        where, params = "", (limit,)
+        if before_id:
+            where = "WHERE (updated_at, id) < (SELECT updated_at, id FROM transcripts WHERE id = ?)"
+            params = (_id_to_blob(before_id), limit)
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, content, created_at, updated_at
+                cursor.execute(f"""
+                    SELECT id,
+                           CASE WHEN length(content) > {PREVIEW_LENGTH}
+                                THEN substr(content, 1, {PREVIEW_LENGTH}) || '...'
+                                ELSE content END AS content_preview,
+                           created_at, updated_at
                     FROM transcripts
-                    ORDER BY updated_at DESC
+                    {where}
+                    ORDER BY updated_at DESC, id DESC
                     LIMIT ?
-                """, (limit,))
-                return [dict(row) for row in cursor.fetchall()]
+                """, params)
+                return [_row_to_dict(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Error retrieving recent transcripts: {e}")
             return []
@@ -125,28 +361,42 @@ class AnalysisStorage:
         product: str,
         meeting_date: str,
         analysis_data: Dict[str, Any]
-    ) -> bool:
-        """Save analysis results to the database."""
+    ) -> Optional[Dict[str, Any]]:
+        """Save analysis results to the database.
+        
+        Returns the stored row, which is the existing analysis if one was
+        already saved for the same transcript and meeting metadata (None on
+        error).
+        """
         try:
             with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO analysis_results 
-                    (id, transcript_id, team, product, meeting_date, analysis_data)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    analysis_id,
-                    transcript_id,
-                    team,
-                    product,
-                    meeting_date,
-                    json.dumps(analysis_data)
-                ))
-                conn.commit()
-                return True
+                conn.execute("BEGIN")
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute(INSERT_ANALYSIS_SQL, (
+                        _id_to_blob(analysis_id),
+                        _id_to_blob(transcript_id),
+                        team,
+                        product,
+                        meeting_date,
+                        orjson.dumps(analysis_data).decode()
+                    ))
+                    cursor.execute(
+                        SELECT_ANALYSIS_BY_META_SQL,
+                        (_id_to_blob(transcript_id), team, product, meeting_date)
+                    )
+                    stored = _row_to_dict(cursor.fetchone())
+                    stored["analysis_data"] = orjson.loads(stored["analysis_data"])
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            # The latest analysis for this transcript changed
+            cache.invalidate(transcript_id)
+            return stored
         except Exception as e:
             print(f"Error saving analysis: {e}")
-            return False
+            return None
     
     @staticmethod
     def get_analysis(analysis_id: str) -> Optional[Dict[str, Any]]:
@@ -156,11 +406,11 @@ class AnalysisStorage:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT * FROM analysis_results WHERE id = ?
-                """, (analysis_id,))
+                """, (_id_to_blob(analysis_id),))
                 row = cursor.fetchone()
                 if row:
-                    result = dict(row)
-                    result["analysis_data"] = json.loads(result["analysis_data"])
+                    result = _row_to_dict(row)
+                    result["analysis_data"] = orjson.loads(result["analysis_data"])
                     return result
                 return None
         except Exception as e:
@@ -170,6 +420,9 @@ class AnalysisStorage:
     @staticmethod
     def get_analysis_by_transcript(transcript_id: str) -> Optional[Dict[str, Any]]:
         """Get the most recent analysis for a transcript."""
+        cached = cache.get_analysis_cached(transcript_id)
+        if cached is not None:
+            return cached
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
@@ -178,36 +431,78 @@ class AnalysisStorage:
                     WHERE transcript_id = ?
                     ORDER BY created_at DESC
                     LIMIT 1
-                """, (transcript_id,))
+                """, (_id_to_blob(transcript_id),))
                 row = cursor.fetchone()
-                if row:
-                    result = dict(row)
-                    result["analysis_data"] = json.loads(result["analysis_data"])
-                    return result
-                return None
+            if row:
+                result = _row_to_dict(row)
+                result["analysis_data"] = orjson.loads(result["analysis_data"])
+                cache.set_analysis_cached(transcript_id, result)
+                return result
+            return None
         except Exception as e:
             print(f"Error retrieving analysis by transcript: {e}")
             return None
     
     @staticmethod
-    def get_recent_analyses(limit: int = 10) -> List[Dict[str, Any]]:
-        """Get recent analysis results."""
+    def get_analysis_by_hash_and_meta(
+        transcript_id: str,
+        team: str,
+        product: str,
+        meeting_date: str
+    ) -> Optional[Dict[str, Any]]:
+        """Get the analysis of a (content-addressed) transcript for the given meeting metadata."""
+        # The latest analysis is cached and is usually the one being asked for
+        latest = AnalysisStorage.get_analysis_by_transcript(transcript_id)
+        if latest and (
+            latest["team"] == team and
+            latest["product"] == product and
+            latest["meeting_date"] == meeting_date
+        ):
+            return latest
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    SELECT_ANALYSIS_BY_META_SQL,
+                    (_id_to_blob(transcript_id), team, product, meeting_date)
+                )
+                row = cursor.fetchone()
+            if row:
+                result = _row_to_dict(row)
+                result["analysis_data"] = orjson.loads(result["analysis_data"])
+                return result
+            return None
+        except Exception as e:
+            print(f"Error retrieving analysis by metadata: {e}")
+            return None
+    
+    @staticmethod
+    def get_recent_analyses(limit: int = 10, before_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get recent analysis metadata, newest first.
+        
+        Only item counts are returned from the analysis payload; use
+        get_analysis() for the full result. Pass the last returned ID as
+        `before_id` to fetch the next page.
+        """
+        where, params = "", (limit,)
+        if before_id:
+            where = "WHERE (a.created_at, a.id) < (SELECT created_at, id FROM analysis_results WHERE id = ?)"
+            params = (_id_to_blob(before_id), limit)
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT a.*, t.content as transcript_content
+                cursor.execute(f"""
+                    SELECT a.id, a.transcript_id, a.team, a.product, a.meeting_date, a.created_at,
+                           json_array_length(a.analysis_data, '$.decisions') AS decisions_count,
+                           json_array_length(a.analysis_data, '$.actions') AS actions_count,
+                           substr(t.content, 1, {PREVIEW_LENGTH}) AS preview
                     FROM analysis_results a
                     JOIN transcripts t ON a.transcript_id = t.id
-                    ORDER BY a.created_at DESC
+                    {where}
+                    ORDER BY a.created_at DESC, a.id DESC
                     LIMIT ?
-                """, (limit,))
-                results = []
-                for row in cursor.fetchall():
-                    result = dict(row)
-                    result["analysis_data"] = json.loads(result["analysis_data"])
-                    results.append(result)
-                return results
+                """, params)
+                return [_row_to_dict(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Error retrieving recent analyses: {e}")
             return []
@@ -226,14 +521,10 @@ class SyncStorage:
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO sync_status 
-                    (analysis_id, meeting_url, sync_result, synced_at)
-                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                """, (
-                    analysis_id,
+                cursor.execute(INSERT_SYNC_SQL, (
+                    _id_to_blob(analysis_id),
                     meeting_url,
-                    json.dumps(sync_result)
+                    orjson.dumps(sync_result).decode()
                 ))
                 conn.commit()
                 return True
@@ -249,11 +540,11 @@ class SyncStorage:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT * FROM sync_status WHERE analysis_id = ?
-                """, (analysis_id,))
+                """, (_id_to_blob(analysis_id),))
                 row = cursor.fetchone()
                 if row:
-                    result = dict(row)
-                    result["sync_result"] = json.loads(result["sync_result"])
+                    result = _row_to_dict(row)
+                    result["sync_result"] = orjson.loads(result["sync_result"])
                     return result
                 return None
         except Exception as e:
@@ -263,39 +554,69 @@ class SyncStorage:
 
 def cleanup_old_data(days_old: int = 30):
     """Clean up data older than specified days."""
+    cutoff = f"-{int(days_old)} days"
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            # Clean up old sync status first (foreign key constraint)
-            cursor.execute("""
-                DELETE FROM sync_status 
-                WHERE analysis_id IN (
-                    SELECT id FROM analysis_results 
-                    WHERE created_at < datetime('now', '-{} days')
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                # Transcripts whose cached entries go stale with these deletes
+                cursor.execute("""
+                    SELECT DISTINCT transcript_id FROM analysis_results
+                    WHERE created_at < datetime('now', ?)
+                """, (cutoff,))
+                stale_ids = {row["transcript_id"] for row in cursor.fetchall()}
+                
+                # Clean up old sync status first (foreign key constraint)
+                cursor.execute("""
+                    DELETE FROM sync_status 
+                    WHERE analysis_id IN (
+                        SELECT id FROM analysis_results 
+                        WHERE created_at < datetime('now', ?)
+                    )
+                """, (cutoff,))
+                
+                # Clean up old analysis results
+                cursor.execute("""
+                    DELETE FROM analysis_results 
+                    WHERE created_at < datetime('now', ?)
+                """, (cutoff,))
+                
+                # Clean up orphaned transcripts
+                cursor.execute("""
+                    SELECT t.id FROM transcripts t
+                    LEFT JOIN analysis_results ar ON ar.transcript_id = t.id
+                    WHERE ar.id IS NULL
+                    AND t.updated_at < datetime('now', ?)
+                """, (cutoff,))
+                orphan_ids = [row["id"] for row in cursor.fetchall()]
+                cursor.executemany(
+                    "DELETE FROM transcripts WHERE id = ?",
+                    [(orphan_id,) for orphan_id in orphan_ids]
                 )
-            """.format(days_old))
-            
-            # Clean up old analysis results
-            cursor.execute("""
-                DELETE FROM analysis_results 
-                WHERE created_at < datetime('now', '-{} days')
-            """.format(days_old))
-            
-            # Clean up orphaned transcripts
-            cursor.execute("""
-                DELETE FROM transcripts 
-                WHERE id NOT IN (SELECT transcript_id FROM analysis_results)
-                AND created_at < datetime('now', '-{} days')
-            """.format(days_old))
-            
-            conn.commit()
-            print(f"Cleaned up data older than {days_old} days")
+                stale_ids.update(orphan_ids)
+                
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        for transcript_id in stale_ids:
+            cache.invalidate(_blob_to_id(transcript_id))
+        print(f"Cleaned up data older than {days_old} days")
     except Exception as e:
         print(f"Error during cleanup: {e}")
 
 
-# Initialize database on import
-if not os.path.exists(DATABASE_PATH):
-    init_database()
-    print("Database initialized successfully")
+def incremental_vacuum(pages: int = INCREMENTAL_VACUUM_PAGES) -> None:
+    """Reclaim up to `pages` free pages without rewriting the database."""
+    try:
+        with get_db_connection() as conn:
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    except Exception as e:
+        print(f"Error during incremental vacuum: {e}")
+
 
+def vacuum_database() -> None:
+    """Rebuild the whole database file. Blocks writers; run out-of-band only."""
+    with get_db_connection() as conn:
+        conn.execute("VACUUM")
@@ -2,11 +2,75 @@
 
 import os
 import json
+import asyncio
+from functools import lru_cache
 from typing import Dict, Any
 import google.generativeai as genai
 
 from models import Analysis
 
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+# Schema keywords Gemini's response_schema understands
+_SCHEMA_KEYS = ("type", "description", "enum", "required")
+
+
+def _to_gemini_schema(node: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Pydantic JSON schema node to the OpenAPI subset Gemini accepts."""
+    if "$ref" in node:
+        node = defs[node["$ref"].split("/")[-1]]
+    if "anyOf" in node:
+        # Optional[X] is rendered as anyOf [X, null]
+        variants = [v for v in node["anyOf"] if v.get("type") != "null"]
+        schema = _to_gemini_schema(variants[0], defs)
+        schema["nullable"] = True
+        if "description" in node:
+            schema["description"] = node["description"]
+        return schema
+    
+    schema = {key: node[key] for key in _SCHEMA_KEYS if key in node}
+    if "properties" in node:
+        schema["properties"] = {
+            name: _to_gemini_schema(prop, defs) for name, prop in node["properties"].items()
+        }
+    if "items" in node:
+        schema["items"] = _to_gemini_schema(node["items"], defs)
+    return schema
+
+
+def _analysis_response_schema() -> Dict[str, Any]:
+    """Build the Gemini response schema from the Analysis model."""
+    json_schema = Analysis.model_json_schema()
+    return _to_gemini_schema(json_schema, json_schema.get("$defs", {}))
+
+
+# Static instructions, built once and sent as the model's system instruction
+SYSTEM_PROMPT = """You are an expert meeting analyst. Extract decisions and action items from the meeting transcript.
+
+RULES:
+- Extract only what is explicitly mentioned in the transcript
+- If information is not available, use null values
+- Do not hallucinate or infer information not present
+- Be precise and factual
+
+For each DECISION, identify:
+- title: The actual decision made
+- owner: Person responsible (if mentioned)
+- rationale: Reasoning provided (if mentioned)
+- effective_date: When it takes effect (if mentioned, format YYYY-MM-DD)
+
+For each ACTION ITEM, identify:
+- title: What needs to be done
+- assignee: Who is assigned (if mentioned)
+- due: Due date (if mentioned, format YYYY-MM-DD)
+- priority: Priority level if mentioned (P0/P1/P2 only)
+- notes: Additional context (if any)"""
+
+GENERATION_CONFIG = genai.types.GenerationConfig(
+    response_mime_type="application/json",
+    response_schema=_analysis_response_schema()
+)
+
 
 def init_gemini() -> None:
     """Initialize Gemini with API key from environment."""
@@ -16,7 +80,13 @@ def init_gemini() -> None:
     genai.configure(api_key=api_key)
 
 
-def analyze_transcript(
+@lru_cache(maxsize=4)
+def _get_model(model_name: str) -> genai.GenerativeModel:
+    """Create a Gemini model once per name and reuse it across calls."""
+    return genai.GenerativeModel(model_name=model_name, system_instruction=SYSTEM_PROMPT)
+
+
+async def analyze_transcript(
     transcript: str,
     team: str,
     product: str,
@@ -34,82 +104,24 @@ def analyze_transcript(
     Returns:
         Dictionary containing decisions and actions lists
     """
-    model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    model = _get_model(GEMINI_MODEL)
     
-    # Create the model
-    model = genai.GenerativeModel(model_name=model_name)
-    
-    # JSON schema definition for the response
-    json_schema = """
-    {
-        "decisions": [
-            {
-                "title": "string (required)",
-                "owner": "string or null",
-                "rationale": "string or null", 
-                "effective_date": "YYYY-MM-DD or null"
-            }
-        ],
-        "actions": [
-            {
-                "title": "string (required)",
-                "assignee": "string or null",
-                "due": "YYYY-MM-DD or null",
-                "priority": "P0|P1|P2 or null",
-                "notes": "string or null"
-            }
-        ]
-    }
-    """
-    
-    system_prompt = f"""You are an expert meeting analyst. Extract decisions and action items from the meeting transcript.
-
-RULES:
-- Extract only what is explicitly mentioned in the transcript
-- If information is not available, use null values
-- Do not hallucinate or infer information not present
-- Be precise and factual
-- Return ONLY valid JSON matching the exact schema below
-
-CONTEXT:
+    prompt = f"""CONTEXT:
 - Team: {team}
 - Product: {product}
 - Meeting Date: {meeting_date}
 
-JSON SCHEMA TO FOLLOW:
-{json_schema}
-
-For each DECISION, identify:
-- title: The actual decision made
-- owner: Person responsible (if mentioned)
-- rationale: Reasoning provided (if mentioned)
-- effective_date: When it takes effect (if mentioned, format YYYY-MM-DD)
-
-For each ACTION ITEM, identify:
-- title: What needs to be done
-- assignee: Who is assigned (if mentioned)
-- due: Due date (if mentioned, format YYYY-MM-DD)
-- priority: Priority level if mentioned (P0/P1/P2 only)
-- notes: Additional context (if any)
-
 TRANSCRIPT:
-{transcript}
-
-Return only valid JSON matching the schema above. No explanations, just the JSON."""
+{transcript}"""
 
     try:
-        response = model.generate_content(system_prompt)
-        response_text = response.text.strip()
-        
-        # Clean up the response to extract JSON
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
+        # The SDK call blocks for the whole LLM round-trip; keep it off the event loop
+        response = await asyncio.to_thread(
+            model.generate_content, prompt, generation_config=GENERATION_CONFIG
+        )
         
-        # Parse JSON
-        result = json.loads(response_text)
+        # JSON mode guarantees a bare JSON document matching the schema
+        result = json.loads(response.text)
         
         # Validate the response matches our expected structure
         analysis = Analysis(**result)
@@ -1,44 +1,147 @@
 """Notion synchronization with idempotency for decisions and action items."""
 
 import os
+import time
+import random
+import asyncio
 import hashlib
-from typing import Dict, List, Any, Optional
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Tuple, Union
 from datetime import date
 
-from notion_client import Client
+import httpx
+from aiolimiter import AsyncLimiter
+from notion_client import AsyncClient
+from notion_client.errors import HTTPResponseError
 from models import Decision, ActionItem, Analysis
 
+# Notion allows ~3 requests/s per integration; stay below it to avoid 429/502s
+notion_limiter = AsyncLimiter(max_rate=2, time_period=1.0)
+# Upserts in flight per sync; bounds open connections and queued limiter waiters
+MAX_CONCURRENT_UPSERTS = 8
+# Keep-alive pool shared by every sync in the process
+MAX_CONNECTIONS = 20
+# Notion accepts at most this many children per append call
+MAX_BLOCKS_PER_APPEND = 100
+# Notion accepts at most this many conditions in one compound filter
+MAX_FILTER_CONDITIONS = 100
 
-def init_notion() -> Client:
-    """Initialize Notion client."""
+# Retry rate-limited and transient server errors with exponential backoff
+MAX_ATTEMPTS = 5
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Database schemas rarely change; re-fetch them at most this often
+SCHEMA_TTL_SECONDS = 300
+
+_notion_client: Optional[AsyncClient] = None
+_schema_cache: Dict[str, Tuple[float, Dict[str, str]]] = {}
+
+
+def init_notion() -> AsyncClient:
+    """Return the shared Notion client, creating it on first use."""
+    global _notion_client
     token = os.getenv("NOTION_TOKEN")
     if not token:
         raise ValueError("NOTION_TOKEN environment variable is required")
-    return Client(auth=token)
+    if _notion_client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS
+            ),
+            http2=True
+        )
+        _notion_client = AsyncClient(auth=token, client=http_client)
+    return _notion_client
+
+
+async def close_notion() -> None:
+    """Close the shared Notion client's connection pool."""
+    global _notion_client
+    if _notion_client is not None:
+        await _notion_client.aclose()
+        _notion_client = None
 
 
 def compute_external_id(meeting_url: Optional[str], title: str) -> str:
-    """Compute external ID for idempotency using SHA256."""
+    """Compute external ID for idempotency using 128-bit BLAKE2b."""
+    source = (meeting_url or '') + '|' + title.strip().lower()
+    return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+
+def compute_legacy_external_id(meeting_url: Optional[str], title: str) -> str:
+    """Compute the SHA256 external ID used by pages synced before BLAKE2b IDs."""
     source = (meeting_url or '') + '|' + title.strip().lower()
     return hashlib.sha256(source.encode()).hexdigest()
 
 
-def find_existing_page(
-    notion: Client,
+async def notion_call(method: Callable[..., Awaitable[Any]], **kwargs: Any) -> Any:
+    """Make a rate-limited Notion API call, retrying 429/5xx responses.
+    
+    Waits for the Retry-After header when Notion sends one, otherwise
+    1, 2, 4, ... seconds, plus a little jitter.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            async with notion_limiter:
+                return await method(**kwargs)
+        except HTTPResponseError as e:
+            if e.status not in RETRY_STATUSES or attempt == MAX_ATTEMPTS - 1:
+                raise
+            try:
+                delay = float(e.headers.get("Retry-After", 2 ** attempt))
+            except ValueError:
+                delay = 2 ** attempt
+            await asyncio.sleep(delay + random.random() * 0.1)
+
+
+async def get_database_schema(
+    notion: AsyncClient,
+    database_id: str
+) -> Dict[str, str]:
+    """Map property name to property ID for a database (cached for SCHEMA_TTL_SECONDS)."""
+    cached = _schema_cache.get(database_id)
+    if cached and time.monotonic() - cached[0] < SCHEMA_TTL_SECONDS:
+        return cached[1]
+    database = await notion_call(notion.databases.retrieve, database_id=database_id)
+    schema = {name: prop["id"] for name, prop in database["properties"].items()}
+    _schema_cache[database_id] = (time.monotonic(), schema)
+    return schema
+
+
+def has_property(schema: Optional[Dict[str, str]], name: str) -> bool:
+    """Whether a property can be written (assume yes if the schema is unknown)."""
+    return schema is None or name in schema
+
+
+async def external_id_property(notion: AsyncClient, database_id: str) -> Optional[str]:
+    """Get the property ID of a database's External ID column (None if unknown)."""
+    try:
+        return (await get_database_schema(notion, database_id)).get("External ID")
+    except Exception:
+        return None
+
+
+async def find_existing_page(
+    notion: AsyncClient,
     database_id: str,
     external_id: str
 ) -> Optional[str]:
     """Find existing page by external ID."""
     try:
-        response = notion.databases.query(
-            database_id=database_id,
-            filter={
+        query = {
+            "database_id": database_id,
+            "filter": {
                 "property": "External ID",
                 "rich_text": {
                     "equals": external_id
                 }
-            }
-        )
+            },
+            "page_size": 1
+        }
+        # Only the page ID is needed; don't pull every property back
+        property_id = await external_id_property(notion, database_id)
+        if property_id:
+            query["filter_properties"] = [property_id]
+        response = await notion_call(notion.databases.query, **query)
         
         if response["results"]:
             return response["results"][0]["id"]
@@ -47,143 +150,195 @@ def find_existing_page(
         return None
 
 
-def upsert_action_item(
-    notion: Client,
+async def load_external_id_index(
+    notion: AsyncClient,
     database_id: str,
-    action: ActionItem,
-    meeting_url: Optional[str]
+    external_ids: List[str]
 ) -> Dict[str, str]:
-    """Upsert action item to Notion backlog database."""
-    try:
-        external_id = compute_external_id(meeting_url, action.title)
-        existing_page_id = find_existing_page(notion, database_id, external_id)
-        
-        # Prepare basic properties that should always exist
-        properties = {
-            "Name": {
-                "title": [{"text": {"content": action.title}}]
-            },
-            "External ID": {
-                "rich_text": [{"text": {"content": external_id}}]
+    """Map External ID to page ID for the pages matching `external_ids`.
+    
+    Queries with an `or` filter over the given IDs, split into chunks that
+    fit Notion's compound filter limit, instead of scanning the database.
+    """
+    property_id = await external_id_property(notion, database_id)
+    index = {}
+    for i in range(0, len(external_ids), MAX_FILTER_CONDITIONS):
+        conditions = [
+            {"property": "External ID", "rich_text": {"equals": external_id}}
+            for external_id in external_ids[i:i + MAX_FILTER_CONDITIONS]
+        ]
+        start_cursor = None
+        while True:
+            query = {
+                "database_id": database_id,
+                "filter": {"or": conditions},
+                "page_size": 100
             }
-        }
-        
-        # Add optional properties only if they exist in the database
-        try:
-            # Try to add Status - this might not exist in user's database
-            properties["Status"] = {"select": {"name": "Todo"}}
-        except:
-            pass
+            if property_id:
+                query["filter_properties"] = [property_id]
+            if start_cursor:
+                query["start_cursor"] = start_cursor
+            response = await notion_call(notion.databases.query, **query)
             
-        if action.priority:
-            try:
-                properties["Priority"] = {"select": {"name": action.priority}}
-            except:
-                pass
-        
-        if action.due:
-            try:
-                properties["Due"] = {"date": {"start": action.due.isoformat()}}
-            except:
-                pass
-        
-        if action.notes:
-            try:
-                properties["Notes"] = {
-                    "rich_text": [{"text": {"content": action.notes}}]
-                }
-            except:
-                pass
-        
-        if meeting_url:
-            try:
-                properties["Source"] = {"url": meeting_url}
-            except:
-                pass
-        
-        if existing_page_id:
-            # Update existing page
-            notion.pages.update(page_id=existing_page_id, properties=properties)
-            return {"action": "updated", "page_id": existing_page_id}
-        else:
-            # Create new page
-            response = notion.pages.create(
-                parent={"database_id": database_id},
-                properties=properties
-            )
-            return {"action": "created", "page_id": response["id"]}
+            for page in response["results"]:
+                rich_text = page["properties"].get("External ID", {}).get("rich_text", [])
+                external_id = "".join(part["plain_text"] for part in rich_text)
+                if external_id:
+                    index[external_id] = page["id"]
             
-    except Exception as e:
-        # More detailed error information
-        error_msg = f"Database ID: {database_id}, Error: {str(e)}"
-        if hasattr(e, 'response') and e.response:
-            try:
-                error_detail = e.response.json()
-                error_msg += f", Details: {error_detail}"
-            except:
-                error_msg += f", Status: {e.response.status_code}"
-        raise Exception(error_msg)
+            if not response["has_more"]:
+                break
+            start_cursor = response["next_cursor"]
+    return index
 
 
-def upsert_decision(
-    notion: Client,
-    database_id: str,
+def _candidate_external_ids(meeting_url: Optional[str], titles: List[str]) -> List[str]:
+    """Current and legacy External IDs an existing page for these titles may have."""
+    return [
+        external_id
+        for title in titles
+        for external_id in (
+            compute_external_id(meeting_url, title),
+            compute_legacy_external_id(meeting_url, title)
+        )
+    ]
+
+
+def _rich_text(content: str) -> Dict[str, Any]:
+    return {"rich_text": [{"text": {"content": content}}]}
+
+
+# Constant payloads are shared across items (never mutated)
+_STATUS_TODO = {"select": {"name": "Todo"}}
+
+
+def build_action_props(
+    action: ActionItem,
+    external_id: str,
+    meeting_url: Optional[str],
+    schema: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """Build page properties for an action item, skipping optional ones missing from `schema`."""
+    properties = {
+        "Name": {"title": [{"text": {"content": action.title}}]},
+        "External ID": _rich_text(external_id)
+    }
+    if has_property(schema, "Status"):
+        properties["Status"] = _STATUS_TODO
+    if action.priority and has_property(schema, "Priority"):
+        properties["Priority"] = {"select": {"name": action.priority}}
+    if action.due and has_property(schema, "Due"):
+        properties["Due"] = {"date": {"start": action.due.isoformat()}}
+    if action.notes and has_property(schema, "Notes"):
+        properties["Notes"] = _rich_text(action.notes)
+    if meeting_url and has_property(schema, "Source"):
+        properties["Source"] = {"url": meeting_url}
+    return properties
+
+
+def build_decision_props(
     decision: Decision,
-    meeting_url: Optional[str]
+    external_id: str,
+    meeting_url: Optional[str],
+    schema: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """Build page properties for a decision, skipping optional ones missing from `schema`."""
+    properties = {
+        "Name": {"title": [{"text": {"content": decision.title}}]},
+        "External ID": _rich_text(external_id)
+    }
+    if decision.owner and has_property(schema, "Owner"):
+        properties["Owner"] = _rich_text(decision.owner)
+    if decision.rationale and has_property(schema, "Rationale"):
+        properties["Rationale"] = _rich_text(decision.rationale)
+    if decision.effective_date and has_property(schema, "Effective Date"):
+        properties["Effective Date"] = {"date": {"start": decision.effective_date.isoformat()}}
+    if meeting_url and has_property(schema, "Source"):
+        properties["Source"] = {"url": meeting_url}
+    return properties
+
+
+def _text_block(block_type: str, content: str, **extra: Any) -> Dict[str, Any]:
+    return {
+        "object": "block",
+        "type": block_type,
+        block_type: {"rich_text": [{"type": "text", "text": {"content": content}}], **extra}
+    }
+
+
+def build_action_block(action: ActionItem) -> Dict[str, Any]:
+    """Render an action item as a to-do block."""
+    details = [action.assignee, action.priority, action.due and f"due {action.due.isoformat()}"]
+    details = [detail for detail in details if detail]
+    text = action.title + (f" ({', '.join(details)})" if details else "")
+    if action.notes:
+        text += f" - {action.notes}"
+    return _text_block("to_do", text, checked=False)
+
+
+def build_decision_block(decision: Decision) -> Dict[str, Any]:
+    """Render a decision as a bulleted list item."""
+    details = [decision.owner, decision.effective_date and f"effective {decision.effective_date.isoformat()}"]
+    details = [detail for detail in details if detail]
+    text = decision.title + (f" ({', '.join(details)})" if details else "")
+    if decision.rationale:
+        text += f" - {decision.rationale}"
+    return _text_block("bulleted_list_item", text)
+
+
+async def append_meeting_blocks(
+    notion: AsyncClient,
+    page_id: str,
+    analysis: Analysis
+) -> None:
+    """Append all decisions and actions to a meeting page, 100 blocks per request."""
+    blocks = []
+    if analysis.decisions:
+        blocks.append(_text_block("heading_2", "Decisions"))
+        blocks.extend(build_decision_block(decision) for decision in analysis.decisions)
+    if analysis.actions:
+        blocks.append(_text_block("heading_2", "Action Items"))
+        blocks.extend(build_action_block(action) for action in analysis.actions)
+    
+    # Chunks are sent in order so the page reads top to bottom
+    for start in range(0, len(blocks), MAX_BLOCKS_PER_APPEND):
+        await notion_call(
+            notion.blocks.children.append,
+            block_id=page_id,
+            children=blocks[start:start + MAX_BLOCKS_PER_APPEND]
+        )
+
+
+async def upsert_page(
+    notion: AsyncClient,
+    database_id: str,
+    external_id: str,
+    properties: Dict[str, Any],
+    existing_ids: Optional[Dict[str, str]] = None,
+    legacy_external_id: Optional[str] = None
 ) -> Dict[str, str]:
-    """Upsert decision to Notion decisions database."""
+    """Create or update the page with `external_id` in a database.
+    
+    `existing_ids` is a prefetched External ID -> page ID index; without it
+    the database is queried for this item. A page found by
+    `legacy_external_id` is updated, which rewrites its External ID.
+    """
     try:
-        external_id = compute_external_id(meeting_url, decision.title)
-        existing_page_id = find_existing_page(notion, database_id, external_id)
-        
-        # Prepare basic properties that should always exist
-        properties = {
-            "Name": {
-                "title": [{"text": {"content": decision.title}}]
-            },
-            "External ID": {
-                "rich_text": [{"text": {"content": external_id}}]
-            }
-        }
-        
-        # Add optional properties only if they exist in the database
-        if decision.owner:
-            try:
-                properties["Owner"] = {
-                    "rich_text": [{"text": {"content": decision.owner}}]
-                }
-            except:
-                pass
-        
-        if decision.rationale:
-            try:
-                properties["Rationale"] = {
-                    "rich_text": [{"text": {"content": decision.rationale}}]
-                }
-            except:
-                pass
-        
-        if decision.effective_date:
-            try:
-                properties["Effective Date"] = {
-                    "date": {"start": decision.effective_date.isoformat()}
-                }
-            except:
-                pass
-        
-        if meeting_url:
-            try:
-                properties["Source"] = {"url": meeting_url}
-            except:
-                pass
+        if existing_ids is not None:
+            existing_page_id = existing_ids.get(external_id) or existing_ids.get(legacy_external_id)
+        else:
+            existing_page_id = await find_existing_page(notion, database_id, external_id)
+            if not existing_page_id and legacy_external_id:
+                existing_page_id = await find_existing_page(notion, database_id, legacy_external_id)
         
         if existing_page_id:
             # Update existing page
-            notion.pages.update(page_id=existing_page_id, properties=properties)
+            await notion_call(notion.pages.update, page_id=existing_page_id, properties=properties)
             return {"action": "updated", "page_id": existing_page_id}
         else:
             # Create new page
-            response = notion.pages.create(
+            response = await notion_call(
+                notion.pages.create,
                 parent={"database_id": database_id},
                 properties=properties
             )
@@ -201,57 +356,163 @@ def upsert_decision(
         raise Exception(error_msg)
 
 
-def sync_to_notion(
-    analysis_data: Dict[str, Any],
-    meeting_url: Optional[str] = None
+async def upsert_action_item(
+    notion: AsyncClient,
+    database_id: str,
+    action: ActionItem,
+    meeting_url: Optional[str],
+    existing_ids: Optional[Dict[str, str]] = None,
+    schema: Optional[Dict[str, str]] = None
+) -> Dict[str, str]:
+    """Upsert action item to Notion backlog database."""
+    external_id = compute_external_id(meeting_url, action.title)
+    properties = build_action_props(action, external_id, meeting_url, schema)
+    return await upsert_page(
+        notion, database_id, external_id, properties, existing_ids,
+        compute_legacy_external_id(meeting_url, action.title)
+    )
+
+
+async def upsert_decision(
+    notion: AsyncClient,
+    database_id: str,
+    decision: Decision,
+    meeting_url: Optional[str],
+    existing_ids: Optional[Dict[str, str]] = None,
+    schema: Optional[Dict[str, str]] = None
+) -> Dict[str, str]:
+    """Upsert decision to Notion decisions database."""
+    external_id = compute_external_id(meeting_url, decision.title)
+    properties = build_decision_props(decision, external_id, meeting_url, schema)
+    return await upsert_page(
+        notion, database_id, external_id, properties, existing_ids,
+        compute_legacy_external_id(meeting_url, decision.title)
+    )
+
+
+async def sync_to_notion(
+    analysis_data: Union[Analysis, Dict[str, Any]],
+    meeting_url: Optional[str] = None,
+    meeting_page_id: Optional[str] = None,
+    known_empty: bool = False
 ) -> Dict[str, Any]:
     """
     Sync analysis results to Notion databases.
     
     Args:
-        analysis_data: Analysis results with decisions and actions
+        analysis_data: Analysis results with decisions and actions (a
+            validated Analysis is used as-is)
         meeting_url: Optional meeting URL for source reference
+        meeting_page_id: Append everything as blocks to this page in batched
+            requests instead of upserting database rows (not idempotent)
+        known_empty: Caller guarantees nothing from this meeting was synced
+            yet; skip existing-page lookups and create every page directly
         
     Returns:
         Dictionary with created and updated counts
     """
+    # Parse analysis data unless the caller already holds a validated model
+    if isinstance(analysis_data, Analysis):
+        analysis = analysis_data
+    else:
+        analysis = Analysis.model_validate(analysis_data)
+    
+    results = {
+        "created": {"actions": 0, "decisions": 0},
+        "updated": {"actions": 0, "decisions": 0},
+        "errors": []
+    }
+    
+    # Nothing to write; don't touch the client or the API
+    if not analysis.actions and not analysis.decisions:
+        return results
+    
+    # The LLM often repeats an item (e.g. differing only in case); items with
+    # the same external ID would hit the same page, so keep the last one
+    analysis = analysis.model_copy(update={
+        "actions": list({
+            compute_external_id(meeting_url, action.title): action for action in analysis.actions
+        }.values()),
+        "decisions": list({
+            compute_external_id(meeting_url, decision.title): decision for decision in analysis.decisions
+        }.values())
+    })
+    
     notion = init_notion()
     
+    if meeting_page_id:
+        try:
+            await append_meeting_blocks(notion, meeting_page_id, analysis)
+            results["created"]["actions"] = len(analysis.actions)
+            results["created"]["decisions"] = len(analysis.decisions)
+        except Exception as e:
+            results["errors"].append(f"Meeting page {meeting_page_id}: {str(e)}")
+        return results
+    
     backlog_db = os.getenv("NOTION_BACKLOG_DB")
     decisions_db = os.getenv("NOTION_DECISIONS_DB")
     
     if not backlog_db or not decisions_db:
         raise ValueError("NOTION_BACKLOG_DB and NOTION_DECISIONS_DB environment variables are required")
     
-    # Parse analysis data
-    analysis = Analysis(**analysis_data)
+    # Schemas first (the index queries reuse them to narrow their payload),
+    # then one filtered query per database for this sync's External IDs
+    # instead of a query per item; fall back to all properties / per-item
+    # lookups if either fails
+    backlog_schema, decisions_schema = [
+        None if isinstance(outcome, Exception) else outcome
+        for outcome in await asyncio.gather(
+            get_database_schema(notion, backlog_db),
+            get_database_schema(notion, decisions_db),
+            return_exceptions=True
+        )
+    ]
+    if known_empty:
+        backlog_index, decisions_index = {}, {}
+    else:
+        backlog_index, decisions_index = [
+            None if isinstance(outcome, Exception) else outcome
+            for outcome in await asyncio.gather(
+                load_external_id_index(notion, backlog_db, _candidate_external_ids(
+                    meeting_url, [action.title for action in analysis.actions]
+                )),
+                load_external_id_index(notion, decisions_db, _candidate_external_ids(
+                    meeting_url, [decision.title for decision in analysis.decisions]
+                )),
+                return_exceptions=True
+            )
+        ]
     
-    results = {
-        "created": {"actions": 0, "decisions": 0},
-        "updated": {"actions": 0, "decisions": 0},
-        "errors": []
-    }
+    # Fan out all upserts; notion_limiter paces the actual requests
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPSERTS)
     
-    # Sync action items
-    for action in analysis.actions:
-        try:
-            result = upsert_action_item(notion, backlog_db, action, meeting_url)
-            if result["action"] == "created":
-                results["created"]["actions"] += 1
-            else:
-                results["updated"]["actions"] += 1
-        except Exception as e:
-            results["errors"].append(f"Action '{action.title}': {str(e)}")
+    async def bounded(upsert):
+        async with semaphore:
+            return await upsert
     
-    # Sync decisions
-    for decision in analysis.decisions:
-        try:
-            result = upsert_decision(notion, decisions_db, decision, meeting_url)
-            if result["action"] == "created":
-                results["created"]["decisions"] += 1
-            else:
-                results["updated"]["decisions"] += 1
-        except Exception as e:
-            results["errors"].append(f"Decision '{decision.title}': {str(e)}")
+    tasks = [
+        bounded(upsert_action_item(
+            notion, backlog_db, action, meeting_url, backlog_index, backlog_schema
+        ))
+        for action in analysis.actions
+    ] + [
+        bounded(upsert_decision(
+            notion, decisions_db, decision, meeting_url, decisions_index, decisions_schema
+        ))
+        for decision in analysis.decisions
+    ]
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    items = (
+        [("actions", "Action", a) for a in analysis.actions] +
+        [("decisions", "Decision", d) for d in analysis.decisions]
+    )
+    for (kind, label, item), outcome in zip(items, outcomes):
+        if isinstance(outcome, Exception):
+            results["errors"].append(f"{label} '{item.title}': {str(outcome)}")
+        elif outcome["action"] == "created":
+            results["created"][kind] += 1
+        else:
+            results["updated"][kind] += 1
     
     return results
@@ -384,7 +384,7 @@ class MeetingActionsApp {
 
             container.innerHTML = transcripts.map(transcript => {
                 const date = new Date(transcript.created_at).toLocaleDateString();
-                const preview = transcript.content_preview || transcript.content.substring(0, 200) + '...';
+                const preview = transcript.content_preview;
                 
                 return `
                     <div class="history-item" data-transcript-id="${transcript.id}">
@@ -431,8 +431,8 @@ class MeetingActionsApp {
 
             container.innerHTML = analyses.map(analysis => {
                 const date = new Date(analysis.created_at).toLocaleDateString();
-                const decisionsCount = analysis.analysis_data.decisions?.length || 0;
-                const actionsCount = analysis.analysis_data.actions?.length || 0;
+                const decisionsCount = analysis.decisions_count || 0;
+                const actionsCount = analysis.actions_count || 0;
                 
                 return `
                     <div class="history-item" data-analysis-id="${analysis.id}">
@@ -499,17 +499,15 @@ class MeetingActionsApp {
 
     async recoverAnalysis(analysisId) {
         try {
-            const response = await fetch(`/history/analyses?limit=50`);
+            const response = await fetch(`/history/analyses/${analysisId}`);
+            if (response.status === 404) {
+                throw new Error('Analysis not found');
+            }
             if (!response.ok) {
                 throw new Error(`HTTP ${response.status}: ${response.statusText}`);
             }
 
-            const data = await response.json();
-            const analysis = data.analyses.find(a => a.id === analysisId);
-            
-            if (!analysis) {
-                throw new Error('Analysis not found');
-            }
+            const analysis = await response.json();
             
             // Restore everything
             this.transcriptId = analysis.transcript_id;
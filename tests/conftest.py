@@ -0,0 +1,115 @@
+"""Shared fixtures: a throwaway SQLite database and a stubbed Notion client."""
+
+import os
+import queue
+import sys
+from typing import Any, Dict, List, Optional
+
+import pytest
+from aiolimiter import AsyncLimiter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache
+import database
+import notion_sync
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Point the storage layer at an empty temp database without initializing it."""
+    path = str(tmp_path / "meeting_actions.db")
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setattr(database, "DATABASE_PATH", path)
+    monkeypatch.setattr(database, "_POOL", queue.Queue(maxsize=database.POOL_SIZE))
+    monkeypatch.setattr(database, "_pool_ready", False)
+    monkeypatch.setattr(database, "_schema_ready", False)
+    cache._l1.clear()
+    yield path
+    while not database._POOL.empty():
+        database._POOL.get().close()
+    cache._l1.clear()
+
+
+@pytest.fixture
+def db(db_path):
+    """An initialized temp database; yields the database module."""
+    database.init_database()
+    return database
+
+
+class FakeDatabases:
+    """databases endpoint holding pages in memory and honouring External ID filters."""
+
+    def __init__(self, pages: Dict[str, List[Dict[str, Any]]]):
+        self.pages = pages
+        self.queries: List[Dict[str, Any]] = []
+
+    async def retrieve(self, database_id: str) -> Dict[str, Any]:
+        names = ["Name", "External ID", "Status", "Priority", "Due", "Notes",
+                 "Source", "Owner", "Rationale", "Effective Date"]
+        return {"properties": {name: {"id": name.lower()} for name in names}}
+
+    async def query(self, database_id: str, **kwargs: Any) -> Dict[str, Any]:
+        self.queries.append(kwargs)
+        conditions = kwargs["filter"].get("or", [kwargs["filter"]])
+        wanted = {condition["rich_text"]["equals"] for condition in conditions}
+        results = [
+            page for page in self.pages.get(database_id, [])
+            if _external_id(page) in wanted
+        ]
+        return {"results": results, "has_more": False, "next_cursor": None}
+
+
+class FakePages:
+    """pages endpoint recording creates and updates."""
+
+    def __init__(self):
+        self.created: List[Dict[str, Any]] = []
+        self.updated: List[Dict[str, Any]] = []
+
+    async def create(self, parent: Dict[str, str], properties: Dict[str, Any]) -> Dict[str, str]:
+        self.created.append({"parent": parent, "properties": properties})
+        return {"id": f"new-{len(self.created)}"}
+
+    async def update(self, page_id: str, properties: Dict[str, Any]) -> Dict[str, str]:
+        self.updated.append({"page_id": page_id, "properties": properties})
+        return {"id": page_id}
+
+
+class FakeNotion:
+    """Stand-in for notion_client.AsyncClient."""
+
+    def __init__(self, pages: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.databases = FakeDatabases(pages or {})
+        self.pages = FakePages()
+
+
+def _external_id(page: Dict[str, Any]) -> str:
+    rich_text = page["properties"]["External ID"]["rich_text"]
+    return "".join(part["plain_text"] for part in rich_text)
+
+
+def notion_page(page_id: str, external_id: str) -> Dict[str, Any]:
+    """A query result page carrying only its External ID."""
+    return {
+        "id": page_id,
+        "properties": {"External ID": {"rich_text": [{"plain_text": external_id}]}}
+    }
+
+
+@pytest.fixture
+def fake_notion(monkeypatch):
+    """Install a FakeNotion as the shared client; call it with existing pages per database."""
+    monkeypatch.setenv("NOTION_TOKEN", "test-token")
+    monkeypatch.setenv("NOTION_BACKLOG_DB", "backlog")
+    monkeypatch.setenv("NOTION_DECISIONS_DB", "decisions")
+    monkeypatch.setattr(notion_sync, "notion_limiter", AsyncLimiter(max_rate=1000, time_period=1.0))
+    monkeypatch.setattr(notion_sync, "_schema_cache", {})
+
+    def install(pages: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> FakeNotion:
+        client = FakeNotion(pages)
+        monkeypatch.setattr(notion_sync, "_notion_client", client)
+        return client
+
+    return install
@@ -0,0 +1,147 @@
+"""Tests for the SQLite storage layer."""
+
+import sqlite3
+import uuid
+
+import cache
+import database
+
+
+def _set_timestamps(db, table, column, row_id, timestamp):
+    with db.get_db_connection() as conn:
+        conn.execute(
+            f"UPDATE {table} SET {column} = ? WHERE id = ?",
+            (timestamp, db._id_to_blob(row_id))
+        )
+
+
+def test_recent_transcripts_keyset_pagination(db):
+    ids = []
+    for i in range(5):
+        transcript_id = db.compute_transcript_id(f"transcript {i}")
+        db.TranscriptStorage.save_transcript(transcript_id, f"transcript {i}")
+        _set_timestamps(db, "transcripts", "updated_at", transcript_id, f"2026-01-0{i + 1} 00:00:00")
+        ids.append(transcript_id)
+    newest_first = ids[::-1]
+
+    first = db.TranscriptStorage.get_recent_transcripts(2)
+    assert [row["id"] for row in first] == newest_first[:2]
+
+    second = db.TranscriptStorage.get_recent_transcripts(2, first[-1]["id"])
+    assert [row["id"] for row in second] == newest_first[2:4]
+
+    last = db.TranscriptStorage.get_recent_transcripts(2, second[-1]["id"])
+    assert [row["id"] for row in last] == newest_first[4:]
+
+
+def test_recent_analyses_keyset_pagination(db):
+    transcript_id = db.compute_transcript_id("transcript")
+    db.TranscriptStorage.save_transcript(transcript_id, "transcript")
+    ids = []
+    for i in range(3):
+        analysis_id = str(uuid.uuid4())
+        db.AnalysisStorage.save_analysis(
+            analysis_id, transcript_id, "team", "product", f"2026-01-0{i + 1}",
+            {"decisions": [], "actions": [{"title": "a"}]}
+        )
+        _set_timestamps(db, "analysis_results", "created_at", analysis_id, f"2026-01-0{i + 1} 00:00:00")
+        ids.append(analysis_id)
+
+    first = db.AnalysisStorage.get_recent_analyses(2)
+    assert [row["id"] for row in first] == [ids[2], ids[1]]
+    assert first[0]["actions_count"] == 1
+
+    second = db.AnalysisStorage.get_recent_analyses(2, first[-1]["id"])
+    assert [row["id"] for row in second] == [ids[0]]
+
+
+def test_save_analysis_returns_the_stored_row_on_metadata_conflict(db):
+    transcript_id = db.compute_transcript_id("transcript")
+    db.TranscriptStorage.save_transcript(transcript_id, "transcript")
+    winner_id, loser_id = str(uuid.uuid4()), str(uuid.uuid4())
+
+    stored = db.AnalysisStorage.save_analysis(
+        winner_id, transcript_id, "team", "product", "2026-01-01", {"winner": True}
+    )
+    assert stored["id"] == winner_id
+
+    stored = db.AnalysisStorage.save_analysis(
+        loser_id, transcript_id, "team", "product", "2026-01-01", {"winner": False}
+    )
+    assert stored["id"] == winner_id
+    assert stored["analysis_data"] == {"winner": True}
+    assert db.AnalysisStorage.get_analysis(loser_id) is None
+
+
+def test_save_transcript_refreshes_updated_at_and_strips_content(db):
+    transcript_id = db.compute_transcript_id("  hello  ")
+    db.TranscriptStorage.save_transcript(transcript_id, "  hello  ")
+    _set_timestamps(db, "transcripts", "updated_at", transcript_id, "2000-01-01 00:00:00")
+
+    db.TranscriptStorage.save_transcript(transcript_id, "hello\n")
+
+    with db.get_db_connection() as conn:
+        row = conn.execute("SELECT content, updated_at FROM transcripts").fetchone()
+    assert row["content"] == "hello"
+    assert row["updated_at"] > "2000-01-01 00:00:00"
+
+
+def test_text_ids_are_migrated_to_blob_keys(db_path):
+    transcript_id, analysis_id = str(uuid.uuid4()), str(uuid.uuid4())
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE transcripts (
+            id TEXT PRIMARY KEY, content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE analysis_results (
+            id TEXT PRIMARY KEY, transcript_id TEXT NOT NULL, team TEXT NOT NULL,
+            product TEXT NOT NULL, meeting_date TEXT NOT NULL, analysis_data TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE sync_status (
+            analysis_id TEXT PRIMARY KEY, meeting_url TEXT, sync_result TEXT,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    conn.execute("INSERT INTO transcripts (id, content) VALUES (?, ?)", (transcript_id, "kept"))
+    conn.execute("INSERT INTO transcripts (id, content) VALUES ('not-a-uuid', 'dropped')")
+    conn.execute(
+        "INSERT INTO analysis_results (id, transcript_id, team, product, meeting_date, analysis_data) "
+        "VALUES (?, ?, 'team', 'product', '2026-01-01', '{\"actions\": []}')",
+        (analysis_id, transcript_id)
+    )
+    conn.execute("INSERT INTO sync_status (analysis_id, sync_result) VALUES (?, '{}')", (analysis_id,))
+    conn.commit()
+    conn.close()
+
+    database.init_database()
+
+    with database.get_db_connection() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == database.CURRENT_SCHEMA_VERSION
+        assert conn.execute("SELECT count(*) FROM transcripts").fetchone()[0] == 1
+        assert conn.execute("SELECT typeof(id) FROM analysis_results").fetchone()[0] == "blob"
+    assert database.TranscriptStorage.get_transcript(transcript_id) == "kept"
+    assert database.AnalysisStorage.get_analysis(analysis_id)["transcript_id"] == transcript_id
+    assert database.SyncStorage.get_sync_status(analysis_id) is not None
+
+
+def test_cleanup_invalidates_cached_entries(db):
+    transcript_id = db.compute_transcript_id("old transcript")
+    db.TranscriptStorage.save_transcript(transcript_id, "old transcript")
+    db.AnalysisStorage.save_analysis(
+        str(uuid.uuid4()), transcript_id, "team", "product", "2026-01-01", {"actions": []}
+    )
+    # Warm both cache entries
+    assert db.TranscriptStorage.get_transcript(transcript_id) == "old transcript"
+    assert db.AnalysisStorage.get_analysis_by_hash_and_meta(transcript_id, "team", "product", "2026-01-01")
+    with db.get_db_connection() as conn:
+        conn.execute("UPDATE analysis_results SET created_at = datetime('now', '-40 days')")
+        conn.execute("UPDATE transcripts SET updated_at = datetime('now', '-40 days')")
+
+    db.cleanup_old_data(30)
+
+    assert cache.get_transcript_cached(transcript_id) is None
+    assert cache.get_analysis_cached(transcript_id) is None
+    assert db.TranscriptStorage.get_transcript(transcript_id) is None
@@ -0,0 +1,98 @@
+"""Tests for Notion retries and idempotent syncing."""
+
+import asyncio
+
+import httpx
+import pytest
+from notion_client.errors import HTTPResponseError
+
+import notion_sync
+from conftest import notion_page
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of waiting them out."""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(notion_sync.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(notion_sync.random, "random", lambda: 0.0)
+    return delays
+
+
+def _failing(statuses, headers=None):
+    """An API method failing with each of `statuses` in turn, then succeeding."""
+    calls = []
+
+    async def method(**kwargs):
+        calls.append(kwargs)
+        if len(calls) <= len(statuses):
+            response = httpx.Response(statuses[len(calls) - 1], headers=headers or {})
+            raise HTTPResponseError(response)
+        return {"ok": True}
+
+    return method, calls
+
+
+def test_notion_call_honours_retry_after(fake_notion, sleeps):
+    method, calls = _failing([429], headers={"Retry-After": "3"})
+
+    assert asyncio.run(notion_sync.notion_call(method, page_id="p")) == {"ok": True}
+    assert len(calls) == 2
+    assert sleeps == [3.0]
+
+
+def test_notion_call_backs_off_exponentially_then_gives_up(fake_notion, sleeps):
+    method, calls = _failing([503] * notion_sync.MAX_ATTEMPTS)
+
+    with pytest.raises(HTTPResponseError):
+        asyncio.run(notion_sync.notion_call(method))
+    assert len(calls) == notion_sync.MAX_ATTEMPTS
+    assert sleeps == [1, 2, 4, 8]
+
+
+def test_notion_call_does_not_retry_client_errors(fake_notion, sleeps):
+    method, calls = _failing([400])
+
+    with pytest.raises(HTTPResponseError):
+        asyncio.run(notion_sync.notion_call(method))
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_sync_dedupes_items_by_external_id(fake_notion):
+    notion = fake_notion()
+    analysis = {
+        "actions": [{"title": "Ship the release"}, {"title": "  ship the RELEASE "}],
+        "decisions": [{"title": "Use SQLite"}]
+    }
+
+    results = asyncio.run(notion_sync.sync_to_notion(analysis, "https://meet/1"))
+
+    assert results["created"] == {"actions": 1, "decisions": 1}
+    assert results["errors"] == []
+    assert len(notion.pages.created) == 2
+
+
+def test_sync_updates_pages_found_by_legacy_external_id(fake_notion):
+    meeting_url = "https://meet/1"
+    legacy_id = notion_sync.compute_legacy_external_id(meeting_url, "Ship the release")
+    notion = fake_notion({"backlog": [notion_page("legacy-page", legacy_id)]})
+
+    results = asyncio.run(notion_sync.sync_to_notion(
+        {"actions": [{"title": "Ship the release"}]}, meeting_url
+    ))
+
+    assert results["updated"]["actions"] == 1
+    assert notion.pages.created == []
+    (update,) = notion.pages.updated
+    assert update["page_id"] == "legacy-page"
+    # The page is moved over to the current External ID
+    external_id = update["properties"]["External ID"]["rich_text"][0]["text"]["content"]
+    assert external_id == notion_sync.compute_external_id(meeting_url, "Ship the release")
+    # Only this sync's candidate IDs were queried
+    (query,) = notion.databases.queries
+    assert len(query["filter"]["or"]) == 2